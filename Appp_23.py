@@ -1,18 +1,14 @@
 # app.py
 import streamlit as st
 import pandas as pd
-import pdfplumber
-import openpyxl
 import re
 import os
+import io
+import csv
 import base64
-
-# To parse .docx files, you need to install python-docx
-try:
-    import docx
-except ImportError:
-    st.error("The 'python-docx' library is not installed. Please install it by running: pip install python-docx")
-    st.stop()
+import bisect
+import itertools
+from types import MappingProxyType
 
 # ===============================================
 # === GLOBAL CONFIG & STYLING ===
@@ -38,6 +34,7 @@ a:hover {text-decoration: underline;}
 # ===============================================
 # === HEADER AND LOGO ===
 # ===============================================
+@st.cache_resource
 def get_image_as_base64(path):
     if os.path.exists(path):
         with open(path, "rb") as img_file:
@@ -123,95 +120,212 @@ ENRICHED_DB = {
     "tlv9001qdckrq1": {"part_name": "Low-Power RRIO Op-Amp", "use": "Signal amplification in sensor interfaces and control loops", "manufacturer": "Texas Instruments", "grade": "Automotive (AEC-Q100)", "voltage_min": 1.8, "voltage_max": 5.5, "temp_min": -40, "temp_max": 125, "performance_tier": "1-MHz Gain-Bandwidth"},
 }
 
-COMBINED_DB = {**load_bom_data(), **ENRICHED_DB}
-KEYWORD_TO_STANDARD_MAP = { "gps": "NMEA 0183", "can": "ISO 11898", "ip rating": "IEC 60529" }
-TEST_CASE_KNOWLEDGE_BASE = { "over-voltage": {"requirement": "Withstand over-voltage", "equipment": ["PSU", "DMM"]} }
+@st.cache_resource
+def build_component_db():
+    # Built once per server process: cache_data would unpickle a fresh copy of the BOM on every rerun.
+    combined_db = MappingProxyType({**load_bom_data(), **ENRICHED_DB})
+    # All part numbers joined into one string, so a lookup is a single substring search;
+    # the offsets map a hit position back to the part number it falls in.
+    keys = tuple(combined_db)
+    offsets = tuple(itertools.accumulate((len(k) + 1 for k in keys[:-1]), initial=0))
+    return combined_db, keys, "\n".join(keys), offsets
+
+COMBINED_DB, COMPONENT_KEYS, COMPONENT_KEY_INDEX, COMPONENT_KEY_OFFSETS = build_component_db()
+
+def find_component_key(part_q):
+    # Exact part number if known, else the first one (in database order) containing part_q, or None.
+    if part_q in COMBINED_DB:
+        return part_q
+    pos = COMPONENT_KEY_INDEX.find(part_q)
+    if pos < 0:
+        return None
+    return COMPONENT_KEYS[bisect.bisect_right(COMPONENT_KEY_OFFSETS, pos) - 1]
+
+# Read-only: the compiled patterns and lookup tuples below are derived from these at import.
+KEYWORD_TO_STANDARD_MAP = MappingProxyType({ "gps": "NMEA 0183", "can": "ISO 11898", "ip rating": "IEC 60529" })
+TEST_CASE_KNOWLEDGE_BASE = MappingProxyType({ "over-voltage": {"requirement": "Withstand over-voltage", "equipment": ["PSU", "DMM"]} })
+# Frozen views for the requirement generator loop, built once instead of per test case;
+# keys are lowercased here so they can be compared directly against the lowercased input.
+TEST_CASE_ITEMS = tuple((key.lower(), info) for key, info in TEST_CASE_KNOWLEDGE_BASE.items())
+DEFAULT_REQUIREMENT = {"requirement": "Generic requirement - system must be tested as described.", "equipment": ["N/A"]}
+REPORT_COLUMN_MAP = {'test': 'TestName', 'standard': 'Standard', 'result': 'Result', 'description': 'Description'}
+
+# Report line patterns, fused into one alternation so each line is matched once.
+# The named outer groups ('arrow', 'colon') tell intelligent_parser which form hit.
+RESULT_LINE_PATTERN = re.compile(
+    r'^(?:(?P<arrow>(?P<arrow_name>.*?)\s*-->\s*(?P<arrow_result>Passed|Failed|Success)\s*-->\s*(?P<arrow_desc>.+))'
+    r'|(?P<colon>(?P<colon_name>.*?)\s*:\s*(?P<colon_result>PASS|FAIL|PASSED|FAILED)))$',
+    re.I,
+)
+PASS_RESULT_WORDS = frozenset(("pass", "passed", "success"))
+# All standard keywords in one case-insensitive pattern, so a test name is scanned once.
+# Longest keywords come first so the most specific one wins where several start together;
+# each keyword is its own group and match.lastindex points straight into STANDARDS_BY_GROUP.
+STANDARD_KEYWORDS = tuple(sorted(KEYWORD_TO_STANDARD_MAP.items(), key=lambda kv: -len(kv[0])))
+# An empty map falls back to (?!), which never matches, instead of '' which matches everything with no group.
+STANDARD_KEYWORD_PATTERN = re.compile('|'.join(f'({re.escape(k)})' for k, _ in STANDARD_KEYWORDS) or '(?!)', re.I)
+STANDARDS_BY_GROUP = (None, *(standard for _, standard in STANDARD_KEYWORDS))
 
 # ===============================================
 # === HELPER FUNCTIONS (FOR ALL MODULES) ===
 # ===============================================
-def intelligent_parser(text: str):
+def intelligent_parser(lines):
+    # Accepts any iterable of text lines, so PDF pages can be streamed straight in.
     extracted_tests = []
-    lines = text.split('\n')
-    for line in lines:
-        line = line.strip()
-        if not line: continue
+    for line in filter(None, map(str.strip, lines)):
+        # Both result forms need '-->' or ':'; plain prose lines are rejected without entering the regex engine.
+        if ':' not in line and '-->' not in line:
+            continue
+        match = RESULT_LINE_PATTERN.match(line)
+        if not match:
+            continue
         test_data = {"TestName": "N/A", "Result": "N/A", "Standard": "N/A", "Description": "N/A"}
-        patterns = [
-            r'^(.*?)\s*-->\s*(Passed|Failed|Success)\s*-->\s*(.+)$',
-            r'^(.*?)\s*:\s*(PASS|FAIL|PASSED|FAILED)$'
-        ]
-        match1 = re.match(patterns[0], line, re.I)
-        match2 = re.match(patterns[1], line, re.I)
-        if match1:
-            test_data.update({"TestName": match1.group(1).strip(), "Result": "PASS" if match1.group(2).lower() in ["passed", "success"] else "FAIL", "Description": match1.group(3).strip()})
-        elif match2:
-            test_data.update({"TestName": match2.group(1).strip(), "Result": "PASS" if match2.group(2).lower() in ["pass", "passed"] else "FAIL"})
+        if match.lastgroup == 'arrow':
+            test_data.update({"TestName": match['arrow_name'].strip(), "Result": "PASS" if match['arrow_result'].lower() in PASS_RESULT_WORDS else "FAIL", "Description": match['arrow_desc'].strip()})
         else:
-            continue
-        for keyword, standard in KEYWORD_TO_STANDARD_MAP.items():
-            if keyword in test_data["TestName"].lower():
-                test_data["Standard"] = standard
+            test_data.update({"TestName": match['colon_name'].strip(), "Result": "PASS" if match['colon_result'].lower() in PASS_RESULT_WORDS else "FAIL"})
+        if keyword_match := STANDARD_KEYWORD_PATTERN.search(test_data["TestName"]):
+            test_data["Standard"] = STANDARDS_BY_GROUP[keyword_match.lastindex]
         extracted_tests.append(test_data)
     return extracted_tests
 
-def parse_report(uploaded_file):
-    if not uploaded_file: return []
+def pdf_lines(raw):
+    # Yields the report's lines page by page, so only one page of text is held at a time.
+    # PyMuPDF extracts plain text far faster than pdfplumber; fall back to pdfplumber without it,
+    # or for a PDF it rejects (its FileDataError is a RuntimeError). Nothing has been yielded yet at that point.
     try:
-        file_extension = os.path.splitext(uploaded_file.name.lower())[1]
-        if file_extension in ['.csv', '.xlsx']:
-            df = pd.read_csv(uploaded_file) if file_extension == '.csv' else pd.read_excel(uploaded_file)
-            df.columns = [str(c).strip().lower() for c in df.columns]
-            rename_map = {'test': 'TestName', 'standard': 'Standard', 'result': 'Result', 'description': 'Description'}
-            df.rename(columns=rename_map, inplace=True)
-            return df.to_dict('records')
+        import pymupdf
+        doc = pymupdf.open(stream=raw, filetype="pdf")
+    except (ImportError, RuntimeError):
+        import pdfplumber
+        with pdfplumber.open(io.BytesIO(raw)) as pdf:
+            for page in pdf.pages:
+                yield from (page.extract_text() or "").splitlines()
+        return
+    with doc:
+        for page in doc:
+            yield from page.get_text("text").splitlines()
+
+def docx_lines(document):
+    # Soft line breaks come through as '\n' inside a paragraph's text, so each paragraph is split into lines.
+    for paragraph in document.paragraphs:
+        yield from paragraph.text.splitlines()
+    # Results tables are read row by row as "name: result" lines; merged cells repeat, so adjacent duplicates are dropped.
+    for table in document.tables:
+        for row in table.rows:
+            cells = filter(None, (" ".join(cell.text.split()) for cell in row.cells))
+            yield ": ".join(text for text, _ in itertools.groupby(cells))
+
+def normalise_cell(value):
+    # Blank cells read as None (openpyxl) or '' (calamine, csv); calamine returns whole numbers as floats.
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def is_blank_row(row):
+    return all(v == '' for v in row)
+
+def rows_to_records(rows):
+    # First non-blank row is the header; columns are normalised to the keys the test cards expect.
+    rows = itertools.dropwhile(is_blank_row, (tuple(map(normalise_cell, row)) for row in rows))
+    header = (str(c).strip().lower() for c in next(rows, ()))
+    columns = [REPORT_COLUMN_MAP.get(c, c) for c in header]
+    return [dict(zip(columns, row)) for row in rows if not is_blank_row(row)]
+
+def xlsx_records(raw):
+    # python-calamine (Rust) reads workbooks several times faster than openpyxl; fall back to openpyxl without it.
+    # Both backends return the sheet from A1, leading blank rows and columns included.
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError:
+        import openpyxl
+        # read_only streams rows instead of building the whole workbook in memory
+        wb = openpyxl.load_workbook(io.BytesIO(raw), read_only=True, data_only=True)
+        try:
+            return rows_to_records(wb.worksheets[0].iter_rows(values_only=True))
+        finally:
+            wb.close()
+    return rows_to_records(CalamineWorkbook.from_filelike(io.BytesIO(raw)).get_sheet_by_index(0).to_python(skip_empty_area=False))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def parse_report_bytes(file_name, raw):
+    # Cached on the file name and content, so reruns with the same upload skip parsing;
+    # bounded because every distinct upload from every session adds an entry.
+    try:
+        file_extension = os.path.splitext(file_name.lower())[1]
+        if file_extension == '.csv':
+            return rows_to_records(csv.reader(io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8-sig', errors='ignore', newline='')))
+        elif file_extension == '.xlsx':
+            return xlsx_records(raw)
         elif file_extension == '.pdf':
-             with pdfplumber.open(uploaded_file) as pdf:
-                content = "".join(page.extract_text() + "\n" for page in pdf.pages if page.extract_text())
-        else:
-            content = uploaded_file.getvalue().decode('utf-8', errors='ignore')
-        return intelligent_parser(content)
+            return intelligent_parser(pdf_lines(raw))
+        elif file_extension == '.docx':
+            # To parse .docx files, you need to install python-docx
+            try:
+                import docx
+            except ImportError:
+                st.error("The 'python-docx' library is not installed. Please install it by running: pip install python-docx")
+                return []
+            return intelligent_parser(docx_lines(docx.Document(io.BytesIO(raw))))
+        # Decoded lazily line by line instead of materialising the whole text; universal newlines cover \r\n reports
+        return intelligent_parser(io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8', errors='ignore'))
     except Exception as e:
         st.error(f"An error occurred while parsing the report: {e}")
         return []
 
-def display_test_card(test_case, color):
-    details = f"<b>🧪 Test:</b> {test_case.get('TestName', 'N/A')}<br>"
-    for key, label in {'Standard': '📘 Standard', 'Description': '💬 Description'}.items():
-        if pd.notna(value := test_case.get(key)) and str(value).strip() and value != 'N/A':
-            details += f"<b>{label}:</b> {value}<br>"
-    st.markdown(f"<div class='card' style='border-left-color:{color};'>{details}</div>", unsafe_allow_html=True)
+def parse_report(uploaded_file):
+    if not uploaded_file: return []
+    # Read the upload once; every branch parses from these in-memory bytes.
+    return parse_report_bytes(uploaded_file.name, uploaded_file.getvalue())
+
+TEST_CARD_TEMPLATE = "<div class='card' style='border-left-color:{color};'><b>🧪 Test:</b> {name}<br>{details}</div>"
+TEST_CARD_DETAIL_TEMPLATE = "<b>{}:</b> {}<br>"
+TEST_CARD_FIELDS = (('Standard', '📘 Standard'), ('Description', '💬 Description'))
+
+def build_test_card(test_case, color):
+    details = "".join(
+        TEST_CARD_DETAIL_TEMPLATE.format(label, value)
+        for key, label in TEST_CARD_FIELDS
+        if pd.notna(value := test_case.get(key)) and str(value).strip() and value != 'N/A'
+    )
+    return TEST_CARD_TEMPLATE.format(color=color, name=test_case.get('TestName', 'N/A'), details=details)
+
+def display_test_cards(test_cases, color):
+    # One st.markdown call per group instead of one per test keeps large reports responsive.
+    st.markdown("".join(build_test_card(t, color) for t in test_cases), unsafe_allow_html=True)
+
+DATASHEET_SPEC_ORDER = (
+    ("Category", "category", ""), ("Series", "series", ""), ("Packaging", "packaging", ""), ("Part Status", "part_status", ""),
+    ("Filter Type", "filter_type", ""), ("Number of Lines", "number_of_lines", ""),
+    ("Current Rating (Max)", "current_rating_max_ma", "mA"), ("DC Resistance (Max)", "dcr_max_ohm", "Ohm"),
+    ("Operating Temperature", "operating_temp_range", ""), ("Features", "features", ""), ("Mounting Type", "mounting_type", ""),
+    ("Size / Dimension", "size_dimension_mm", ""), ("Height (Max)", "height_max_mm", "mm"),
+    ("Package / Case", "package_case", ""), ("Base Product Number", "base_product_number", "")
+)
+SPEC_ROW_TEMPLATE = "<div class='spec-label'>{}</div><div class='spec-value'>{}{}</div>"
 
 def display_datasheet_details(part_number, data):
-    st.markdown(f"<div class='datasheet-card'>", unsafe_allow_html=True)
-    st.markdown(f"<div class='datasheet-title'>{data.get('part_name', part_number.upper())}</div>", unsafe_allow_html=True)
-    st.markdown(f"<div class='datasheet-subtitle'><b>Manufacturer:</b> {data.get('manufacturer', 'N/A')}</div>", unsafe_allow_html=True)
-    st.markdown(f"<p><b>Primary Use / Application:</b> {data.get('use', 'General Purpose')}</p>", unsafe_allow_html=True)
-    st.markdown("<hr style='border-top: 1px solid #e9ecef; margin: 15px 0;'>", unsafe_allow_html=True)
-    
-    st.markdown("<div class='spec-grid'>", unsafe_allow_html=True)
-    spec_order = [
-        ("Category", "category"), ("Series", "series"), ("Packaging", "packaging"), ("Part Status", "part_status"),
-        ("Filter Type", "filter_type"), ("Number of Lines", "number_of_lines"),
-        ("Current Rating (Max)", "current_rating_max_ma", "mA"), ("DC Resistance (Max)", "dcr_max_ohm", "Ohm"),
-        ("Operating Temperature", "operating_temp_range"), ("Features", "features"), ("Mounting Type", "mounting_type"),
-        ("Size / Dimension", "size_dimension_mm"), ("Height (Max)", "height_max_mm", "mm"),
-        ("Package / Case", "package_case"), ("Base Product Number", "base_product_number")
+    html = [
+        "<div class='datasheet-card'>",
+        f"<div class='datasheet-title'>{data.get('part_name', part_number.upper())}</div>",
+        f"<div class='datasheet-subtitle'><b>Manufacturer:</b> {data.get('manufacturer', 'N/A')}</div>",
+        f"<p><b>Primary Use / Application:</b> {data.get('use', 'General Purpose')}</p>",
+        "<hr style='border-top: 1px solid #e9ecef; margin: 15px 0;'>",
+        "<div class='spec-grid'>",
     ]
     if "operating_temp_min_c" in data and "operating_temp_max_c" in data:
-        data["operating_temp_range"] = f"{data['operating_temp_min_c']}°C ~ {data['operating_temp_max_c']}°C"
+        data = {**data, "operating_temp_range": f"{data['operating_temp_min_c']}°C ~ {data['operating_temp_max_c']}°C"}
     
-    has_specs = False
-    for label, key, *unit in spec_order:
-        if key in data and data.get(key):
-            has_specs = True
-            value = f"{data[key]}{unit[0]}" if unit and data[key] else data[key]
-            st.markdown(f"<div class='spec-label'>{label}</div><div class='spec-value'>{value}</div>", unsafe_allow_html=True)
-            
-    if not has_specs:
-        st.markdown("<div class='spec-label'>Details</div><div class='spec-value'>Standard component data loaded from BOM. For full datasheet specifications, please refer to the manufacturer's website.</div>", unsafe_allow_html=True)
+    spec_rows = [SPEC_ROW_TEMPLATE.format(label, value, unit) for label, key, unit in DATASHEET_SPEC_ORDER if (value := data.get(key))]
+    html.extend(spec_rows)
+    if not spec_rows:
+        html.append("<div class='spec-label'>Details</div><div class='spec-value'>Standard component data loaded from BOM. For full datasheet specifications, please refer to the manufacturer's website.</div>")
         
-    st.markdown("</div></div>", unsafe_allow_html=True)
+    html.append("</div></div>")
+    # One markdown element, so the spec rows actually nest inside the card and grid divs.
+    st.markdown("".join(html), unsafe_allow_html=True)
 
 # ===============================================
 # === MAIN APP LAYOUT & NAVIGATION ===
@@ -225,25 +339,32 @@ option = st.sidebar.radio("Go to", ("Test Report Verification", "Component Infor
 if option == "Test Report Verification":
     st.header("Test Report Verification")
     st.caption("Upload and analyze test reports from various formats.")
-    uploaded_file = st.file_uploader("Upload a report file", type=["pdf", "xlsx", "csv", "txt"])
+    uploaded_file = st.file_uploader("Upload a report file", type=["pdf", "docx", "xlsx", "csv", "txt"])
     if uploaded_file:
         parsed_data = parse_report(uploaded_file)
         if parsed_data:
             st.success(f"Successfully parsed {len(parsed_data)} test results.")
-            passed = [t for t in parsed_data if "PASS" in str(t.get("Result", "")).upper()]
-            failed = [t for t in parsed_data if "FAIL" in str(t.get("Result", "")).upper()]
-            others = [t for t in parsed_data if not ("PASS" in str(t.get("Result", "")).upper() or "FAIL" in str(t.get("Result", "")).upper())]
+            passed, failed, others = [], [], []
+            for t in parsed_data:
+                result = str(t.get("Result", "")).upper()
+                # FAIL is checked first so a mixed result such as "PASS/FAIL" is never hidden from Failed
+                if "FAIL" in result:
+                    failed.append(t)
+                elif "PASS" in result:
+                    passed.append(t)
+                else:
+                    others.append(t)
             
             st.markdown(f"### Analysis Complete: {len(passed)} Passed, {len(failed)} Failed, {len(others)} Other")
             if passed:
                 with st.expander("✅ Passed Cases", expanded=True):
-                    for t in passed: display_test_card(t, '#28a745')
+                    display_test_cards(passed, '#28a745')
             if failed:
                 with st.expander("❌ Failed Cases", expanded=True):
-                    for t in failed: display_test_card(t, '#dc3545')
+                    display_test_cards(failed, '#dc3545')
             if others:
                 with st.expander("ℹ️ Other/Informational Items"):
-                    for t in others: display_test_card(t, '#6c757d')
+                    display_test_cards(others, '#6c757d')
         else:
             st.warning("No recognizable test data was extracted from the report.")
 
@@ -254,11 +375,12 @@ elif option == "Component Information":
     st.header("Component Key Information")
     st.caption("Search the complete BOM for detailed component specifications.")
     
-    part_q = st.text_input("Enter Manufacturer Part Number for Detailed Lookup", placeholder="e.g., ecmf04-4hswm10y").lower().strip()
+    part_q = st.text_input("Enter Manufacturer Part Number for Detailed Lookup", placeholder="e.g., ecmf04-4hswm10y")
     
     if st.button("Search Component"):
+        part_q = part_q.lower().strip()
         if part_q:
-            key = next((k for k in COMBINED_DB if part_q in k.lower()), None)
+            key = find_component_key(part_q)
             if key:
                 st.session_state.found_component = {"part_number": key, **COMBINED_DB[key]}
             else:
@@ -278,17 +400,20 @@ elif option == "Test Requirement Generation":
     text = st.text_area("Enter test keywords (one per line)", "over-voltage test\nCAN bus functionality\nIP67 rating check", height=100)
     
     if st.button("Generate Requirements"):
-        cases = [l.strip() for l in text.split("\n") if l.strip()]
+        cases = list(filter(None, map(str.strip, text.splitlines())))
         if cases:
             st.markdown("#### Generated Requirements")
+            cards = []
             for i, case in enumerate(cases):
-                req = next((info for key, info in TEST_CASE_KNOWLEDGE_BASE.items() if key in case.lower()), {"requirement": "Generic requirement - system must be tested as described.", "equipment": ["N/A"]})
-                html = f"""
+                case_lower = case.lower()
+                req = next((info for key, info in TEST_CASE_ITEMS if key in case_lower), DEFAULT_REQUIREMENT)
+                cards.append(f"""
                 <div class='card' style='border-left-color:#7c3aed;'>
                     <b>Test Case:</b> {case.title()}<br>
                     <b>Requirement ID:</b> REQ-{i+1:03d}<br>
                     <b>Requirement:</b> {req['requirement']}<br>
                     <b>Suggested Equipment:</b> {', '.join(req['equipment'])}
                 </div>
-                """
-                st.markdown(html, unsafe_allow_html=True)
+                """)
+            # One markdown element for all requirement cards instead of one per test case.
+            st.markdown("".join(cards), unsafe_allow_html=True)